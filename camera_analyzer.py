@@ -1,142 +1,185 @@
 import cv2
 import numpy as np
-import subprocess
+import queue
+import threading
 import time
-from pathlib import Path
-from datetime import datetime
-import tempfile
-import os
-
-def read_frame(self):
-    """Capture a single frame via libcamera-still using a temp file"""
-    with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-        tmp_path = tmp.name
-
-    cmd = [
-        "libcamera-still",
-        "-n",              # no preview
-        "--immediate",     # capture instantly
-        "--width", "640",
-        "--height", "480",
-        "-o", tmp_path
-    ]
-    try:
-        subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-        frame = cv2.imread(tmp_path)
-        os.remove(tmp_path)
-        if frame is None:
-            return False, None
-        return True, frame
-    except subprocess.CalledProcessError:
-        if os.path.exists(tmp_path):
-            os.remove(tmp_path)
-        return False, None
+
+from frame_sources import make_source
+from motion_kernel import changed_at_least
+
 
 class CameraReader:
-    """Camera analyzer using libcamera-still (Bookworm compatible)"""
+    """Camera analyzer over a pluggable FrameSource (picamera2 by default)"""
 
-    def __init__(self, display=True):
+    def __init__(
+        self, display=True, source="picamera2", width=640, height=480, path=None
+    ):
         self.display = display
+        self.source = make_source(source, width, height, path)
         self.frame_count = 0
         self.start_time = time.time()
         self.motion_threshold = 0.30  # percent difference threshold
         self._reactions = []
+        self._last_gray = None
+        self._spare_gray = None
+        self._small_buf = None
+        # Two slots: one frame being analyzed, one fresh frame waiting
+        self._frames = queue.Queue(maxsize=2)
+        self._stop_reading = threading.Event()
+        self._reader = None
 
     def add_reaction(self, reaction):
         self._reactions.append(reaction)
 
     def connect(self):
-        """Test if libcamera works"""
-        print("🎥 Checking libcamera access...")
-        try:
-            subprocess.run(
-                ["libcamera-still", "-n", "--immediate", "-o", "/dev/null"],  check=True)
-            print("✓ Camera ready (libcamera-still)")
-            return True
-        except subprocess.CalledProcessError:
-            print("❌ libcamera-still failed to capture a frame")
-            return False
+        """Open the configured frame source"""
+        return self.source.connect()
 
     def read_frame(self):
-        """Capture a single frame via libcamera-still using a temp file"""
-        with tempfile.NamedTemporaryFile(suffix=".jpg", delete=False) as tmp:
-            tmp_path = tmp.name
-    
-        cmd = [
-            "libcamera-still",
-            "-n",              # no preview
-            "--immediate",     # capture instantly
-            "--width", "640",
-            "--height", "480",
-            "-o", tmp_path
-        ]
-        try:
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            frame = cv2.imread(tmp_path)
-            os.remove(tmp_path)
-            if frame is None:
-                return False, None
-            return True, frame
-        except subprocess.CalledProcessError:
-            if os.path.exists(tmp_path):
-                os.remove(tmp_path)
-            return False, None
+        """Grab the latest frame from the configured source"""
+        return self.source.read()
+
+    def release(self):
+        """Close the configured frame source"""
+        self.source.release()
+
+    def _reader_loop(self, interval):
+        """Acquire frames in the background so capture overlaps analysis"""
+        while not self._stop_reading.is_set():
+            started = time.monotonic()
+            try:
+                item = self.read_frame()
+            except Exception as e:
+                # Hand the error to run() so it is raised there instead of hanging
+                item = e
+            if self.source.exhausted:
+                # None tells run() the source has no more frames
+                item = None
+            try:
+                self._frames.put_nowait(item)
+            except queue.Full:
+                # Drop the stale frame rather than queueing latency
+                try:
+                    self._frames.get_nowait()
+                except queue.Empty:
+                    pass
+                self._frames.put_nowait(item)
+            if item is None or isinstance(item, Exception):
+                return
+            self._stop_reading.wait(interval - (time.monotonic() - started))
+
+    def _start_reader(self, fps):
+        self._stop_reading.clear()
+        self._reader = threading.Thread(
+            target=self._reader_loop, args=(1.0 / fps,), daemon=True
+        )
+        self._reader.start()
+
+    def _stop_reader(self):
+        if self._reader is not None:
+            self._stop_reading.set()
+            self._reader.join(timeout=2)
+            self._reader = None
+
+    def _motion_gray(self, frame, out=None):
+        """Shrink a frame 4x per side and take its green channel for motion checks"""
+        height, width = frame.shape[:2]
+        size = (max(width // 4, 1), max(height // 4, 1))
+        if self._small_buf is None or self._small_buf.shape[:2] != size[::-1]:
+            self._small_buf = np.empty((size[1], size[0], 3), np.uint8)
+        small = cv2.resize(
+            frame, size, dst=self._small_buf, interpolation=cv2.INTER_AREA
+        )
+        if out is None or out.shape != size[::-1]:
+            out = np.empty(size[::-1], np.uint8)
+        # Green tracks luma closely enough for a change mask and needs no arithmetic
+        return cv2.extractChannel(small, 1, dst=out)
 
     def was_motion_detected(self, frame, last_frame):
         """Detect motion between two frames"""
-        gray1 = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        gray2 = cv2.cvtColor(last_frame, cv2.COLOR_BGR2GRAY)
-        diff = cv2.absdiff(gray1, gray2)
-        _, thresh = cv2.threshold(diff, 25, 255, cv2.THRESH_BINARY)
-        changed_pixels = np.count_nonzero(thresh)
-        total_pixels = thresh.size
-        change_percent = (changed_pixels / total_pixels) * 100
-        return change_percent >= self.motion_threshold
+        # The changed-pixel ratio is scale invariant, so diff at 1/16 the pixels
+        gray1 = self._motion_gray(frame, self._spare_gray)
+        # last_frame was the previous call's frame, so its gray is already cached
+        gray2 = self._last_gray
+        if gray2 is None or gray2.shape != gray1.shape:
+            # First call, or the frame size changed since the cached gray
+            gray2 = self._motion_gray(last_frame)
+        # The previous gray is only needed for this diff; recycle it next frame
+        self._spare_gray = gray2
+        self._last_gray = gray1
+        min_changed = gray1.size * self.motion_threshold / 100
+        return changed_at_least(gray1, gray2, 25, min_changed)
 
     def run(self, fps=1, max_frames=None):
         """Run the analyzer loop"""
         if not self.connect():
             return
 
-        print("\n🚀 Running live camera analysis (libcamera)\n")
+        print(f"\n🚀 Running live camera analysis ({self.source.name})\n")
         last_frame = None
+        # Grays cached by an earlier run may belong to a different source
+        self._last_gray = None
+        self._spare_gray = None
+        self._start_reader(fps)
+
+        # Bind per-frame lookups to locals once instead of on every iteration
+        display = self.display
+        get_frame = self._frames.get
+        # Wait a couple of frame intervals before checking the reader is still alive
+        timeout = max(1.0, 2.0 / fps)
+        motion_detected = self.was_motion_detected
+        reactions = self._reactions
 
         try:
             while True:
                 if max_frames and self.frame_count >= max_frames:
                     break
 
-                ret, frame = self.read_frame()
+                try:
+                    item = get_frame(timeout=timeout)
+                except queue.Empty:
+                    if not self._reader.is_alive():
+                        raise RuntimeError("Frame reader stopped unexpectedly")
+                    continue
+                if item is None:
+                    print("⏹️ No more frames from the source")
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                ret, frame = item
                 if not ret or frame is None:
                     print("⚠️ Failed to read frame")
                     time.sleep(1)
                     continue
 
-                if last_frame is not None and self.was_motion_detected(frame, last_frame):
-                    for reaction in self._reactions:
+                if last_frame is not None and motion_detected(frame, last_frame):
+                    for reaction in reactions:
                         reaction.run()
 
                 self.frame_count += 1
                 last_frame = frame
 
-                if self.display:
+                if display:
                     cv2.imshow("Camera Analyzer", frame)
-                    if cv2.waitKey(1) & 0xFF == ord('q'):
+                    if cv2.waitKey(1) & 0xFF == ord("q"):
                         break
 
-                time.sleep(1.0 / fps)
-
         except KeyboardInterrupt:
             print("\n🛑 Interrupted by user")
 
         finally:
+            self._stop_reader()
+            self.release()
             cv2.destroyAllWindows()
             self.print_summary()
 
     def print_summary(self):
         elapsed = time.time() - self.start_time
         avg_fps = self.frame_count / elapsed if elapsed > 0 else 0
-        print(f"\n📊 Summary: {self.frame_count} frames in {elapsed:.1f}s ({avg_fps:.2f} FPS)")
+        print(
+            f"\n📊 Summary: {self.frame_count} frames in {elapsed:.1f}s ({avg_fps:.2f} FPS)"
+        )
+
 
 class CameraAnalyzerInterface:
     def __init__(self):
@@ -144,5 +187,3 @@ class CameraAnalyzerInterface:
 
     def run(self):
         pass
-    
-
@@ -0,0 +1,212 @@
+"""
+Frame sources for CameraReader.
+
+Each source opens one kind of camera and hands back BGR frames through the
+same connect/read/release interface, so the analyzer loop and motion path
+don't need to know where frames come from.
+"""
+
+import os
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import cv2
+
+try:
+    from picamera2 import Picamera2
+except ImportError:
+    Picamera2 = None
+
+try:
+    from turbojpeg import TJPF_BGR, TurboJPEG
+except ImportError:
+    TurboJPEG = None
+
+WEB_DIR = Path(__file__).parent / "web"
+
+
+class FrameSource(ABC):
+    """Base class for anything CameraReader can pull frames from"""
+
+    name = "source"
+    # Finite sources (video files) set this once every frame has been read
+    exhausted = False
+
+    def connect(self):
+        """Open the source, returning True if frames can be read"""
+        return True
+
+    @abstractmethod
+    def read(self):
+        """Return (ret, frame) with frame as a BGR uint8 array"""
+
+    def release(self):
+        """Close whatever connect() opened"""
+
+
+class Picamera2Source(FrameSource):
+    """Raspberry Pi camera through a persistent picamera2 video stream"""
+
+    name = "picamera2"
+
+    def __init__(self, width=640, height=480):
+        self.width = width
+        self.height = height
+        self.picam2 = None
+
+    def connect(self):
+        print("🎥 Checking picamera2 access...")
+        if Picamera2 is None:
+            print("❌ picamera2 is not installed")
+            return False
+        try:
+            self.picam2 = Picamera2()
+            # picamera2's "RGB888" is laid out [B, G, R] in memory, i.e. OpenCV order
+            self.picam2.configure(
+                self.picam2.create_video_configuration(
+                    main={"size": (self.width, self.height), "format": "RGB888"},
+                    buffer_count=4,
+                )
+            )
+            self.picam2.start()
+            print("✓ Camera ready (picamera2)")
+            return True
+        except Exception as e:
+            print(f"❌ picamera2 failed to start: {e}")
+            self.picam2 = None
+            return False
+
+    def read(self):
+        return True, self.picam2.capture_array("main")
+
+    def release(self):
+        if self.picam2 is not None:
+            self.picam2.stop()
+            self.picam2.close()
+            self.picam2 = None
+
+
+class FakeSource(FrameSource):
+    """The FFmpeg fake camera, read back from the JPEG it keeps rewriting"""
+
+    name = "fake"
+
+    def __init__(self, web_dir=WEB_DIR):
+        self.frame_path = web_dir / "current_frame.jpg"
+        self._tj = None
+        self._mtime = None
+        self._cached = None
+
+    def connect(self):
+        print("🎥 Checking fake camera output...")
+        self._tj = _open_turbojpeg()
+        decoder = "libjpeg-turbo" if self._tj is not None else "OpenCV"
+        print(f"✓ Camera ready (polling {self.frame_path}, {decoder} decode)")
+        return True
+
+    def read(self):
+        """Decode the fake camera's JPEG, skipping the decode if it hasn't changed"""
+        try:
+            mtime = os.stat(self.frame_path).st_mtime_ns
+        except FileNotFoundError:
+            return False, None
+        if mtime != self._mtime:
+            if self._tj is not None:
+                try:
+                    with open(self.frame_path, "rb") as f:
+                        frame = self._tj.decode(f.read(), pixel_format=TJPF_BGR)
+                except OSError:
+                    frame = None
+            else:
+                frame = cv2.imread(str(self.frame_path))
+            # FFmpeg may be mid-write; keep the last frame and retry next read
+            if frame is not None:
+                self._cached = frame
+                self._mtime = mtime
+        return self._cached is not None, self._cached
+
+
+class VideoCaptureSource(FrameSource):
+    """USB/V4L2 webcam by device index, or a video file by path"""
+
+    def __init__(self, device=0):
+        self.device = device
+        self.name = "video" if isinstance(device, (str, Path)) else "webcam"
+        self.cap = None
+
+    def connect(self):
+        print(f"🎥 Opening {self.name} {self.device}...")
+        self.cap = cv2.VideoCapture(
+            str(self.device) if self.name == "video" else self.device
+        )
+        if not self.cap.isOpened():
+            print(f"❌ Could not open {self.name} {self.device}")
+            return False
+        # Keep only the newest frame so read() doesn't return stale ones
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        print(f"✓ Camera ready ({self.name})")
+        return True
+
+    def read(self):
+        ret, frame = self.cap.read()
+        if not ret and self.name == "video":
+            total = self.cap.get(cv2.CAP_PROP_FRAME_COUNT)
+            position = self.cap.get(cv2.CAP_PROP_POS_FRAMES)
+            self.exhausted = total > 0 and position >= total
+        return ret, frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+
+class ImageSource(FrameSource):
+    """A single still image, decoded once and returned on every read"""
+
+    name = "image"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.frame = None
+
+    def connect(self):
+        print(f"🎥 Loading image {self.path}...")
+        self.frame = cv2.imread(str(self.path))
+        if self.frame is None:
+            print(f"❌ Could not load image {self.path}")
+            return False
+        print("✓ Camera ready (image)")
+        return True
+
+    def read(self):
+        return True, self.frame
+
+
+def make_source(source, width=640, height=480, path=None):
+    """Build a FrameSource from a name, or pass an existing one through"""
+    if isinstance(source, FrameSource):
+        return source
+    if source in ("video", "image") and path is None:
+        raise ValueError(f"The {source} source needs a path")
+    if source == "picamera2":
+        return Picamera2Source(width, height)
+    if source == "fake":
+        return FakeSource()
+    if source == "webcam":
+        return VideoCaptureSource(0 if path is None else int(path))
+    if source == "video":
+        return VideoCaptureSource(Path(path))
+    if source == "image":
+        return ImageSource(path)
+    raise ValueError(f"Unknown frame source: {source}")
+
+
+def _open_turbojpeg():
+    """Load PyTurboJPEG if it and libturbojpeg are available"""
+    if TurboJPEG is None:
+        return None
+    try:
+        return TurboJPEG()
+    except (OSError, RuntimeError):
+        return None
@@ -0,0 +1,85 @@
+"""
+Fused changed-pixel counter for motion detection.
+
+With numba available, one compiled kernel streams both gray frames once and
+returns the count directly instead of writing absdiff and threshold masks
+back to memory. Without numba it falls back to the equivalent OpenCV calls.
+"""
+
+import cv2
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+def _check_shapes(a, b):
+    # The compiled kernel indexes b with a's shape and has no bounds checks
+    if a.shape != b.shape:
+        raise ValueError(f"Frame shapes differ: {a.shape} vs {b.shape}")
+
+
+if njit is not None:
+    ROW_BLOCK = 128
+
+    @njit(parallel=True, fastmath=True, cache=True)
+    def _count_changed(a, b, thr, limit, block=ROW_BLOCK):
+        """Count pixels differing by more than thr, stopping once limit is reached
+
+        Rows are counted in parallel a block at a time, and the scan stops
+        after the first block that brings the count up to limit.
+        """
+        height, width = a.shape
+        n = 0
+        for y0 in range(0, height, block):
+            y1 = min(y0 + block, height)
+            changed = 0
+            for y in prange(y0, y1):
+                row = 0
+                for x in range(width):
+                    row += abs(np.int32(a[y, x]) - np.int32(b[y, x])) > thr
+                changed += row
+            n += changed
+            if n >= limit:
+                break
+        return n
+
+    def count_changed(a, b, thr):
+        """Count pixels whose absolute difference between a and b exceeds thr"""
+        _check_shapes(a, b)
+        # A limit above the pixel count never stops the scan early
+        return _count_changed(a, b, thr, a.size + 1)
+
+    def changed_at_least(a, b, thr, limit):
+        """Return True once at least limit pixels differ by more than thr"""
+        _check_shapes(a, b)
+        return _count_changed(a, b, thr, limit) >= limit
+
+else:
+    TILE = 256
+
+    def count_changed(a, b, thr):
+        """Count pixels whose absolute difference between a and b exceeds thr"""
+        _check_shapes(a, b)
+        return cv2.countNonZero(cv2.compare(cv2.absdiff(a, b), thr, cv2.CMP_GT))
+
+    def changed_at_least(a, b, thr, limit, tile=TILE):
+        """Return True once at least limit pixels differ by more than thr.
+
+        The frames are walked in tile x tile blocks so each block pair stays
+        in L2 on large frames, and the scan stops as soon as the count
+        reaches limit.
+        """
+        _check_shapes(a, b)
+        height, width = a.shape
+        n = 0
+        for y in range(0, height, tile):
+            for x in range(0, width, tile):
+                n += count_changed(
+                    a[y : y + tile, x : x + tile], b[y : y + tile, x : x + tile], thr
+                )
+                if n >= limit:
+                    return True
+        return False
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Bake camera_config.toml into scripts/_baked_config.py
+Run this when building an image with a fixed config; start_camera.py then
+imports the parsed dict instead of parsing the config, as long as the
+config file's SHA-256 still matches the one recorded here.
+"""
+
+import hashlib
+import os
+import pprint
+import sys
+from pathlib import Path
+
+from start_camera import find_config, parse_config
+
+BAKED_PATH = Path(__file__).resolve().parent / "_baked_config.py"
+
+
+def main():
+    config_path = find_config()
+    if not config_path.exists():
+        print(f"Error: Config file not found: {config_path}")
+        sys.exit(1)
+
+    digest = hashlib.sha256(config_path.read_bytes()).hexdigest()
+    config = parse_config(config_path)
+
+    source = (
+        f'"""Generated by scripts/bake_config.py from {config_path.name}; do not edit"""\n'
+        "\n"
+        f'SRC_SHA256 = "{digest}"\n'
+        "\n"
+        f"CONFIG = {pprint.pformat(config, sort_dicts=False)}\n"
+    )
+
+    tmp_path = BAKED_PATH.with_name(f"{BAKED_PATH.name}.{os.getpid()}")
+    tmp_path.write_text(source)
+    tmp_path.replace(BAKED_PATH)
+    print(f"Baked {config_path} -> {BAKED_PATH}")
+
+
+if __name__ == "__main__":
+    main()
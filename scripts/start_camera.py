@@ -4,28 +4,302 @@ Auto-start script for HammyCam
 Reads configuration and starts the appropriate camera
 """
 
-import yaml
-import subprocess
+import asyncio
+import contextlib
+import hashlib
+import pickle
+import shutil
+import signal
+import socket
 import sys
 import os
+import tempfile
 import time
 from pathlib import Path
 
+try:
+    import tomllib
+except ModuleNotFoundError:
+    tomllib = None
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent
+CONFIG_PATH = PROJECT_ROOT / "camera_config.toml"
+LEGACY_CONFIG_PATH = PROJECT_ROOT / "camera_config.yaml"
+WEB_DIR = PROJECT_ROOT / "web"
+CONFIG_CACHE = Path("/tmp/hammycam_config.pkl")
+TIMESTAMP_FILE = Path("/tmp/hammycam_ts")
+
+# FFmpeg filtergraphs, built once at import and .format()ed with the size
+# and the clock's drawtext source
+_FONT_FILE = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+_IMAGE_VF_TEMPLATE = (
+    "scale={width}:{height},"
+    "drawtext="
+    f"fontfile={_FONT_FILE}:"
+    "{clock}:"
+    "fontcolor=white:fontsize=24:x=10:y=10:"
+    "box=1:boxcolor=black@0.5:boxborderw=5"
+)
+_TEST_VF_TEMPLATE = (
+    "drawtext="
+    f"fontfile={_FONT_FILE}:"
+    "text='HammyCam':"
+    "fontcolor=white:fontsize=48:x=(w-text_w)/2:y=(h-text_h)/2-40:"
+    "box=1:boxcolor=black@0.5:boxborderw=5,"
+    "drawtext="
+    f"fontfile={_FONT_FILE}:"
+    "{clock}:"
+    "fontcolor=white:fontsize=36:x=(w-text_w)/2:y=(h-text_h)/2+40:"
+    "box=1:boxcolor=black@0.5:boxborderw=5"
+)
+# The launcher rewrites TIMESTAMP_FILE once a second. With reload=1 drawtext
+# re-reads it on every frame, but only as plain text with no expansion
+_FILE_CLOCK = f"textfile={TIMESTAMP_FILE}:reload=1:expansion=none"
+# Used when the launcher execs into FFmpeg and nobody is left to tick
+_IMAGE_LOCALTIME_CLOCK = "text='HammyCam %{localtime\\:%X}'"
+_TEST_LOCALTIME_CLOCK = "text='%{localtime\\:%X}'"
+
+
+def find_config():
+    """camera_config.toml, or a leftover camera_config.yaml if that is all there is"""
+    if tomllib is not None and CONFIG_PATH.exists():
+        return CONFIG_PATH
+    if LEGACY_CONFIG_PATH.exists():
+        return LEGACY_CONFIG_PATH
+    return CONFIG_PATH
+
 
 def load_config():
-    """Load camera configuration from YAML file"""
-    config_path = Path(__file__).parent.parent / "camera_config.yaml"
+    """Load camera configuration from TOML (or legacy YAML) file"""
+    config_path = find_config()
 
     if not config_path.exists():
         print(f"Error: Config file not found: {config_path}")
         sys.exit(1)
 
+    # A config baked by scripts/bake_config.py needs no parsing at all
+    config = _baked_config(config_path)
+    if config is not None:
+        return config
+
+    # Reuse the last parse while the config file is unchanged
+    stat = config_path.stat()
+    cache_key = (str(config_path), stat.st_mtime_ns, stat.st_size)
+    config = _read_config_cache(cache_key)
+    if config is not None:
+        return config
+
+    config = parse_config(config_path)
+    _write_config_cache(cache_key, config)
+    return config
+
+
+def parse_config(config_path):
+    """Parse a config file, bypassing every cache"""
+    if config_path.suffix == ".toml":
+        if tomllib is None:
+            print(f"Error: Python 3.11+ is needed to read {config_path}")
+            sys.exit(1)
+        with open(config_path, "rb") as f:
+            return tomllib.load(f)
+
+    # PyYAML is only imported for old checkouts still using the YAML config
+    import yaml
+
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
     with open(config_path, "r") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=loader)
+
+
+def _baked_config(config_path):
+    """Return the baked config if it was generated from this exact file"""
+    try:
+        from _baked_config import CONFIG, SRC_SHA256
+    except ImportError:
+        return None
+    if hashlib.sha256(config_path.read_bytes()).hexdigest() != SRC_SHA256:
+        return None
+    return CONFIG
+
+
+def _read_config_cache(cache_key):
+    """Return the cached config if it was parsed from the same file version"""
+    try:
+        with open(CONFIG_CACHE, "rb") as f:
+            # Only trust a cache we wrote ourselves; /tmp is shared
+            if os.fstat(f.fileno()).st_uid != os.getuid():
+                return None
+            key, config = pickle.load(f)
+    except (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError):
+        return None
+    return config if key == cache_key else None
+
+
+def _write_config_cache(cache_key, config):
+    """Store the parsed config for the next start; failures are not fatal"""
+    # mkstemp picks an unpredictable name and refuses to follow a planted symlink
+    try:
+        fd, tmp_name = tempfile.mkstemp(
+            prefix=f"{CONFIG_CACHE.name}.", dir=CONFIG_CACHE.parent
+        )
+    except OSError:
+        return
+    tmp_path = Path(tmp_name)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((cache_key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        tmp_path.replace(CONFIG_CACHE)
+    except OSError:
+        tmp_path.unlink(missing_ok=True)
+
+
+async def wait_port(port, timeout=10.0):
+    """Wait until something accepts TCP connections on localhost:port"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            _, writer = await asyncio.open_connection("127.0.0.1", port)
+        except OSError:
+            await asyncio.sleep(0.02)
+            continue
+        writer.close()
+        await writer.wait_closed()
+        return True
+    return False
+
+
+async def wait_file(path, timeout=10.0, newer_than=0.0, min_size=1024):
+    """Wait until path holds at least min_size bytes written after newer_than"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            stat = path.stat()
+            if stat.st_size > min_size and stat.st_mtime >= newer_than:
+                return True
+        except FileNotFoundError:
+            pass
+        await asyncio.sleep(0.02)
+    return False
+
+
+async def host_ip():
+    """First non-loopback IPv4 address of this host, or None if there isn't one"""
+    loop = asyncio.get_running_loop()
+    try:
+        infos = await loop.getaddrinfo(
+            socket.gethostname(), None, family=socket.AF_INET
+        )
+    except OSError:
+        infos = []
+    for *_, sockaddr in infos:
+        if not sockaddr[0].startswith("127."):
+            return sockaddr[0]
+    # The hostname only maps to loopback; ask the kernel which address it
+    # would route outbound traffic from (connect() on UDP sends nothing)
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as sock:
+            sock.connect(("10.255.255.255", 1))
+            address = sock.getsockname()[0]
+    except OSError:
+        return None
+    return None if address.startswith("127.") else address
+
+
+def _open_log(path):
+    """Open a child's log as a raw close-on-exec fd; the child gets a dup"""
+    return os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | os.O_CLOEXEC, 0o644)
+
+
+def _web_server_cmd(web_dir, web_port):
+    """Serve web/ with darkhttpd if installed, else Python's http.server
+
+    darkhttpd is a single C binary using sendfile(), so the viewer's frame
+    polling no longer goes through a pure-Python request handler.
+    """
+    if shutil.which("darkhttpd"):
+        return ["darkhttpd", str(web_dir), "--port", str(web_port), "--addr", "0.0.0.0"]
+    return ["python3", "-m", "http.server", str(web_port), "--bind", "0.0.0.0"]
+
+
+def _split_cpus():
+    """Give the web server the first usable CPU and FFmpeg the rest
+
+    Keeping the two apart stops them evicting each other's cache lines on
+    small SBCs. Returns (None, None) when there is nothing to split.
+    """
+    if not hasattr(os, "sched_getaffinity"):
+        return None, None
+    cpus = sorted(os.sched_getaffinity(0))
+    if len(cpus) < 2:
+        return None, None
+    return {cpus[0]}, set(cpus[1:])
+
+
+@contextlib.contextmanager
+def _pinned(cpus):
+    """Pin the launcher to cpus while spawning a child, then restore its mask
+
+    The child inherits the mask at fork, so all of its threads start pinned
+    without needing a preexec_fn (which is unsafe with threads running and
+    forces the slow fork path).
+    """
+    if cpus is None:
+        yield
+        return
+    previous = os.sched_getaffinity(0)
+    os.sched_setaffinity(0, cpus)
+    try:
+        yield
+    finally:
+        os.sched_setaffinity(0, previous)
+
 
+def _exec_ffmpeg(ffmpeg_cmd, cpus):
+    """Replace this process with FFmpeg, logging where the child would have"""
+    sys.stdout.flush()
+    sys.stderr.flush()
+    log = _open_log("/tmp/hammycam_ffmpeg.log")
+    os.dup2(log, 1)
+    os.dup2(log, 2)
+    os.close(log)
+    if cpus is not None:
+        os.sched_setaffinity(0, cpus)
+    os.execvp(ffmpeg_cmd[0], ffmpeg_cmd)
 
-def start_web_camera(config):
-    """Start the web camera with FFmpeg directly"""
+
+def _print_running(pids):
+    banner = [
+        "\n" + "=" * 60,
+        "  HammyCam is running!",
+        "=" * 60,
+        f"\n📹 FFmpeg PID: {pids['ffmpeg_pid']}",
+        f"📡 Web Server PID: {pids['webserver_pid']}",
+        "\n💡 To stop: scripts/stop_camera.sh",
+        "\n",
+    ]
+    print("\n".join(banner), flush=True)
+
+
+def _print_urls(web_port, hostname):
+    urls = [
+        "\n🌐 Open in your browser:",
+        f"   http://localhost:{web_port}/simple_web_viewer.html",
+    ]
+    if hostname:
+        urls.append(f"   http://{hostname}:{web_port}/simple_web_viewer.html")
+    print("\n".join(urls))
+
+
+async def start_web_camera(config, processes, exec_ffmpeg=False):
+    """Start the web camera with FFmpeg directly
+
+    Each child is added to processes by name as soon as it is spawned, so
+    the caller can stop it even if startup is interrupted halfway.
+
+    With exec_ffmpeg the launcher waits for the web server and then execs
+    FFmpeg in its own place instead of spawning it, so no Python interpreter
+    stays resident. That call never returns.
+    """
     camera = config["camera"]
     display_config = config.get("display", {})
 
@@ -35,42 +309,60 @@ def start_web_camera(config):
     fps = camera["fps"]
     web_port = display_config.get("web_port", 8080)
 
-    project_root = Path(__file__).parent.parent
-    web_dir = project_root / "web"
-    output_file = web_dir / "current_frame.jpg"
-
-    print("=" * 60)
-    print("  HammyCam Web Camera")
-    print("=" * 60)
-    print(f"Mode: {mode}")
-    print(f"Resolution: {width}x{height} @ {fps}fps")
-    print(f"Web Port: {web_port}")
-    print(f"Output: {output_file}")
-    print("=" * 60)
-
-    # Start Python HTTP server
-    print("\n📡 Starting web server...")
-    webserver_log = open("/tmp/hammycam_webserver.log", "w")
-    webserver_process = subprocess.Popen(
-        ["python3", "-m", "http.server", str(web_port), "--bind", "0.0.0.0"],
-        stdout=webserver_log,
-        stderr=subprocess.STDOUT,
-        cwd=str(web_dir),
-    )
+    output_file = WEB_DIR / "current_frame.jpg"
+
+    banner = [
+        "=" * 60,
+        "  HammyCam Web Camera",
+        "=" * 60,
+        f"Mode: {mode}",
+        f"Resolution: {width}x{height} @ {fps}fps",
+        f"Web Port: {web_port}",
+        f"Output: {output_file}",
+        "=" * 60,
+    ]
+    print("\n".join(banner))
+
+    webserver_cpus, ffmpeg_cpus = _split_cpus()
+
+    # Start static web server
+    webserver_cmd = _web_server_cmd(WEB_DIR, web_port)
+    print(f"\n📡 Starting web server ({webserver_cmd[0]})...")
+    webserver_log = _open_log("/tmp/hammycam_webserver.log")
+    try:
+        with _pinned(webserver_cpus):
+            webserver_process = await asyncio.create_subprocess_exec(
+                *webserver_cmd,
+                stdout=webserver_log,
+                stderr=asyncio.subprocess.STDOUT,
+                cwd=str(WEB_DIR),
+                close_fds=True,
+                start_new_session=True,
+            )
+    finally:
+        os.close(webserver_log)
+    processes["Web server"] = webserver_process
 
     # Save web server PID
     Path("/tmp/hammycam_webserver.pid").write_text(str(webserver_process.pid))
     print(f"✓ Web server started (PID: {webserver_process.pid})")
 
-    # Wait for server to start
-    time.sleep(1)
-
     # Build FFmpeg command
     print("\n📹 Starting FFmpeg camera...")
 
+    ticker = None
+    clock = None
+    if not exec_ffmpeg:
+        # drawtext needs the file to exist when FFmpeg starts; asyncio.run
+        # cancels the ticker along with every other task when main() ends
+        clock = _FILE_CLOCK
+        timestamp_prefix = "HammyCam " if mode == "image" else ""
+        _write_timestamp(timestamp_prefix)
+        ticker = asyncio.create_task(tick_timestamp(timestamp_prefix))
+
     if mode == "image":
         # Image mode
-        image_path = project_root / camera.get("image_path", "images/black.jpg")
+        image_path = PROJECT_ROOT / camera.get("image_path", "images/black.jpg")
 
         ffmpeg_cmd = [
             "ffmpeg",
@@ -82,13 +374,8 @@ def start_web_camera(config):
             "-i",
             str(image_path),
             "-vf",
-            (
-                f"scale={width}:{height},"
-                "drawtext="
-                "fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
-                "text='HammyCam %{localtime\\:%X}':"
-                "fontcolor=white:fontsize=24:x=10:y=10:"
-                "box=1:boxcolor=black@0.5:boxborderw=5"
+            _IMAGE_VF_TEMPLATE.format(
+                width=width, height=height, clock=clock or _IMAGE_LOCALTIME_CLOCK
             ),
             "-q:v",
             "3",  # Quality
@@ -106,18 +393,7 @@ def start_web_camera(config):
             "-i",
             f"color=c=blue:s={width}x{height}:r={fps}",
             "-vf",
-            (
-                "drawtext="
-                "fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
-                "text='HammyCam':"
-                "fontcolor=white:fontsize=48:x=(w-text_w)/2:y=(h-text_h)/2-40:"
-                "box=1:boxcolor=black@0.5:boxborderw=5,"
-                "drawtext="
-                "fontfile=/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf:"
-                "text='%{localtime\\:%X}':"
-                "fontcolor=white:fontsize=36:x=(w-text_w)/2:y=(h-text_h)/2+40:"
-                "box=1:boxcolor=black@0.5:boxborderw=5"
-            ),
+            _TEST_VF_TEMPLATE.format(clock=clock or _TEST_LOCALTIME_CLOCK),
             "-q:v",
             "3",
             "-y",
@@ -126,39 +402,150 @@ def start_web_camera(config):
             str(output_file),
         ]
 
+    if exec_ffmpeg:
+        server_up, hostname = await asyncio.gather(wait_port(web_port), host_ip())
+        if not server_up:
+            print(f"⚠️  Web server is not answering on port {web_port} yet")
+        _print_urls(web_port, hostname)
+
+        # This PID becomes FFmpeg's, so stop_camera.sh keeps working
+        Path("/tmp/hammycam_ffmpeg.pid").write_text(str(os.getpid()))
+        _print_running(
+            {"ffmpeg_pid": os.getpid(), "webserver_pid": webserver_process.pid}
+        )
+        _exec_ffmpeg(ffmpeg_cmd, ffmpeg_cpus)
+
     # Start FFmpeg
-    ffmpeg_log = open("/tmp/hammycam_ffmpeg.log", "w")
-    ffmpeg_process = subprocess.Popen(
-        ffmpeg_cmd, stdout=ffmpeg_log, stderr=subprocess.STDOUT
-    )
+    ffmpeg_started = time.time()
+    ffmpeg_log = _open_log("/tmp/hammycam_ffmpeg.log")
+    try:
+        with _pinned(ffmpeg_cpus):
+            ffmpeg_process = await asyncio.create_subprocess_exec(
+                *ffmpeg_cmd,
+                stdout=ffmpeg_log,
+                stderr=asyncio.subprocess.STDOUT,
+                close_fds=True,
+                start_new_session=True,
+            )
+    finally:
+        os.close(ffmpeg_log)
+    processes["FFmpeg"] = ffmpeg_process
 
     # Save FFmpeg PID
     Path("/tmp/hammycam_ffmpeg.pid").write_text(str(ffmpeg_process.pid))
-    print(f"✓ FFmpeg started (PID: {ffmpeg_process.pid})")
-    print(f"  Logs: /tmp/hammycam_ffmpeg.log")
+    print(
+        f"✓ FFmpeg started (PID: {ffmpeg_process.pid})\n"
+        "  Logs: /tmp/hammycam_ffmpeg.log"
+    )
 
-    # Wait for first frame
-    time.sleep(2)
+    # Wait for the server, the first frame (ignoring one left over from a
+    # previous run) and the container IP lookup all at once
+    server_up, frame_ready, hostname = await asyncio.gather(
+        wait_port(web_port),
+        wait_file(output_file, newer_than=ffmpeg_started),
+        host_ip(),
+    )
+    if not server_up:
+        print(f"⚠️  Web server is not answering on port {web_port} yet")
+    if not frame_ready:
+        print(f"⚠️  No frame written to {output_file} yet")
 
-    # Get container IP
+    _print_urls(web_port, hostname)
+
+    return {
+        "ffmpeg_pid": ffmpeg_process.pid,
+        "webserver_pid": webserver_process.pid,
+        "ticker": ticker,
+    }
+
+
+def _write_timestamp(prefix):
+    """Atomically replace the overlay text so FFmpeg never reads half a write"""
+    # A random name in /tmp, so a planted symlink can't redirect the write
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=f"{TIMESTAMP_FILE.name}.", dir=TIMESTAMP_FILE.parent
+    )
     try:
-        hostname = (
-            subprocess.check_output(["hostname", "-I"]).decode().strip().split()[0]
-        )
-        print(f"\n🌐 Open in your browser:")
-        print(f"   http://localhost:{web_port}/simple_web_viewer.html")
-        print(f"   http://{hostname}:{web_port}/simple_web_viewer.html")
-    except:
-        print(f"\n🌐 Open in your browser:")
-        print(f"   http://localhost:{web_port}/simple_web_viewer.html")
+        with os.fdopen(fd, "w") as f:
+            f.write(prefix + time.strftime("%X"))
+        os.replace(tmp_name, TIMESTAMP_FILE)
+    except OSError:
+        os.unlink(tmp_name)
+        raise
+
 
-    return {"ffmpeg_pid": ffmpeg_process.pid, "webserver_pid": webserver_process.pid}
+async def tick_timestamp(prefix):
+    """Refresh the overlay timestamp at the start of every second"""
+    while True:
+        await asyncio.sleep(1 - time.time() % 1)
+        _write_timestamp(prefix)
+
+
+async def supervise(processes):
+    """Wait until one of the processes exits and return (name, exit code)
+
+    Each child gets a pidfd registered with the event loop. It becomes
+    readable the moment the child exits, so waiting costs no wakeups at all.
+    Without pidfd_open this falls back to asyncio's own child watcher.
+    """
+    loop = asyncio.get_running_loop()
+    exited = loop.create_future()
+    pidfds = []
+    try:
+        for name, proc in processes.items():
+            fd = os.pidfd_open(proc.pid)
+            pidfds.append(fd)
+            loop.add_reader(fd, _mark_exited, exited, name)
+    except (AttributeError, OSError):
+        exited.cancel()
+    try:
+        if exited.cancelled():
+            waits = {
+                asyncio.ensure_future(proc.wait()): name
+                for name, proc in processes.items()
+            }
+            done, pending = await asyncio.wait(
+                waits, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in pending:
+                task.cancel()
+            name = waits[done.pop()]
+        else:
+            name = await exited
+    finally:
+        for fd in pidfds:
+            loop.remove_reader(fd)
+            os.close(fd)
 
+    return name, await processes[name].wait()
 
-def main():
+
+def _exit_status(code):
+    """Map the returncode of the child that exited to the launcher's status"""
+    if code == -signal.SIGTERM:
+        # scripts/stop_camera.sh stops the children with SIGTERM
+        return 0
+    if code < 0:
+        # Killed by another signal; report it the way a shell would
+        return 128 - code
+    # Exiting on its own is always a failure to whoever started the launcher
+    return code or 1
+
+
+def _mark_exited(future, name):
+    if not future.done():
+        future.set_result(name)
+
+
+async def main():
     """Main entry point"""
     print("\n🎥 HammyCam Starting...\n")
 
+    # The overlay clock only ticks while the launcher runs, so the children
+    # must not outlive it; SIGTERM cancels us the same way Ctrl-C does
+    loop = asyncio.get_running_loop()
+    loop.add_signal_handler(signal.SIGTERM, asyncio.current_task().cancel)
+
     # Load configuration
     config = load_config()
 
@@ -172,26 +559,40 @@ def main():
     delay = autostart.get("delay", 2)
     if delay > 0:
         print(f"Waiting {delay} seconds before starting...")
-        time.sleep(delay)
+        await asyncio.sleep(delay)
 
-    # Start web camera
-    pids = start_web_camera(config)
+    processes = {}
+    try:
+        # Start web camera
+        pids = await start_web_camera(
+            config, processes, exec_ffmpeg=autostart.get("exec_ffmpeg", False)
+        )
+        _print_running(pids)
 
-    print("\n" + "=" * 60)
-    print("  HammyCam is running!")
-    print("=" * 60)
-    print(f"\n📹 FFmpeg PID: {pids['ffmpeg_pid']}")
-    print(f"📡 Web Server PID: {pids['webserver_pid']}")
-    print("\n💡 To stop: scripts/stop_camera.sh")
-    print("\n")
+        # Stay in the foreground and notice right away if either child dies
+        name, code = await supervise(processes)
+        if code == -signal.SIGTERM:
+            print(f"\n🛑 {name} was stopped, stopping HammyCam")
+        else:
+            print(f"\n🛑 {name} exited (code {code}), stopping HammyCam")
+    finally:
+        for proc in processes.values():
+            if proc.returncode is None:
+                proc.terminate()
+                await proc.wait()
+
+    return _exit_status(code)
 
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(asyncio.run(main()))
     except KeyboardInterrupt:
         print("\n\nInterrupted by user")
         sys.exit(0)
+    except asyncio.CancelledError:
+        print("\n\nStopped")
+        sys.exit(0)
     except Exception as e:
         print(f"\n\nError: {e}")
         import traceback
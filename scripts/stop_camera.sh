@@ -26,6 +26,9 @@ fi
 # Cleanup any remaining processes
 pkill -f "ffmpeg.*current_frame" 2>/dev/null && echo "✓ Cleaned up remaining FFmpeg processes"
 
+# Remove the overlay timestamp written by start_camera.py
+rm -f /tmp/hammycam_ts
+
 # Remove current frame
 SCRIPT_DIR="$(cd "$(dirname "$0")" && pwd)"
 rm -f "$SCRIPT_DIR/../web/current_frame.jpg"